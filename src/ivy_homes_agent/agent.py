@@ -1,83 +1,366 @@
 """Ivy Homes property inquiry voice agent."""
 
+import asyncio
+import functools
+import hashlib
 import logging
 import os
-from typing import Annotated
+import sys
+from typing import Annotated, Final
 
+import httpx
 from dotenv import load_dotenv
-from livekit import agents, rtc
 from livekit.agents import (
     Agent,
     AgentSession,
-    AutoSubscribe,
     JobContext,
+    JobProcess,
+    RoomInputOptions,
+    RunContext,
     WorkerOptions,
     cli,
     llm,
 )
-from livekit.plugins import openai, silero
+from livekit.plugins import cartesia, deepgram, noise_cancellation, openai, silero
+from openai import AsyncOpenAI
 
-from .property_service import PropertyService
+from .property_service import Property, PropertyService
+from .tool_cache import semantic_cache
+
+# The agent is an I/O-bound fan-out of STT/LLM/TTS WebSockets plus
+# per-20ms audio frame callbacks; uvloop's libuv loop cuts per-await
+# overhead substantially on exactly this workload. Optional: unavailable
+# on Windows, and the default loop remains fully functional.
+try:
+    import uvloop
+
+    uvloop.install()
+except ImportError:
+    pass
 
 load_dotenv()
 
 logger = logging.getLogger("ivy-homes-agent")
 logger.setLevel(logging.INFO)
 
-# Initialize property service
-PROPERTY_SERVICE = PropertyService(
-    data_source=os.getenv("PROPERTY_DATA_SOURCE", "file"),
-    data_path=os.getenv("PROPERTY_DATA_PATH", "data/properties.json"),
-    api_url=os.getenv("PROPERTY_API_URL"),
-    api_key=os.getenv("PROPERTY_API_KEY"),
-)
-
-
-# Property inquiry context for Ivy Homes
-AGENT_INSTRUCTIONS = """You are a friendly and professional voice assistant for Ivy Homes, a real estate company specializing in residential flats in Bangalore.
+# Property service singleton. Constructed in prewarm() rather than at
+# module import: the constructor parses the inventory JSON synchronously,
+# and doing that during import would serialize it ahead of worker startup
+# instead of overlapping it with model prewarming.
+PROPERTY_SERVICE: PropertyService | None = None
+
+
+def _get_property_service() -> PropertyService:
+    """Return the process-wide property service, creating it on first use."""
+    global PROPERTY_SERVICE
+    if PROPERTY_SERVICE is None:
+        PROPERTY_SERVICE = PropertyService(
+            data_source=os.getenv("PROPERTY_DATA_SOURCE", "file"),
+            data_path=os.getenv("PROPERTY_DATA_PATH", "data/properties.json"),
+            api_url=os.getenv("PROPERTY_API_URL"),
+            api_key=os.getenv("PROPERTY_API_KEY"),
+        )
+    return PROPERTY_SERVICE
 
-IMPORTANT: Ivy Homes ONLY sells residential flats (apartments) in Bangalore. We do NOT have:
-- Rental properties (we only sell)
-- Houses, villas, or independent homes
-- Commercial properties
-- Properties outside Bangalore
 
-Your role is to help potential buyers find and purchase flats in Bangalore. You have access to our live property inventory.
+# Fixed opener: the greeting never varies, so it is spoken directly via
+# session.say instead of paying an LLM round-trip to generate it.
+GREETING: Final[str] = (
+    "Hello! Welcome to Ivy Homes. I can help you find residential flats "
+    "for sale in Bangalore. How can I help you today?"
+)
 
-You should:
+# Price thresholds for Indian Rupee formatting
+_CRORE = 10_000_000
+_LAKH = 100_000
+
+# Precompiled response template for property details, so each tool call
+# does one C-level str.format instead of f-string concatenation.
+_DETAIL_TEMPLATE = (
+    "Here are the details for this flat: "
+    "It's a {}-BHK flat with {} bathrooms, "
+    "located in {}, {}. "
+    "The address is {}. "
+    "The price is {}. "
+    "It has {} square feet of space. "
+    "{} "
+    "Built in {}. "
+).format
+
+
+def _format_price(price: float) -> str:
+    """Format a price in Indian Rupees as lakhs or crores."""
+    if price >= _CRORE:
+        return f"₹{price / _CRORE:.2f} crores"
+    return f"₹{price / _LAKH:.2f} lakhs"
+
+
+def _format_property_details(prop: Property) -> str:
+    """Render the full detail description for one flat."""
+    return _DETAIL_TEMPLATE(
+        prop.bedrooms,
+        prop.bathrooms,
+        prop.neighborhood,
+        prop.city or "Bangalore",
+        prop.address or "available on request",
+        _format_price(prop.price),
+        prop.square_feet,
+        prop.description,
+        prop.year_built or "recent year",
+    )
 
-1. Greet callers warmly and identify yourself as the Ivy Homes assistant
-2. Clarify that we specialize in selling residential flats in Bangalore
-3. If they ask about rentals or other property types, politely explain we only sell flats
-4. Gather key requirements for flat purchase:
-   - Preferred area/neighborhood in Bangalore (e.g., Whitefield, Koramangala, HSR Layout, Indiranagar)
-   - Budget range in Indian Rupees (lakhs or crores)
-   - Number of BHK (1 BHK, 2 BHK, 3 BHK, 4 BHK)
-   - Special features (parking, amenities, floor preference, facing)
-   - Timeline for purchase
 
-5. **Use the search_properties function** to find matching flats when you have enough criteria
-   - You MUST call this function when the buyer asks about available flats
-   - Share the results naturally in conversation
-   - Describe flats enthusiastically with details about location, amenities, and features
-   - If no flats match, suggest adjusting their budget or location preferences
+@functools.lru_cache(maxsize=1)
+def get_models() -> dict:
+    """Load the session components once per process and reuse them.
+
+    VAD weights and the plugin HTTP clients cost hundreds of milliseconds
+    to construct; jobs share the same configuration, so each new session
+    reuses these singletons instead of rebuilding them per call.
+    """
+    return {
+        "vad": silero.VAD.load(),
+        # Streaming STT: partial transcripts arrive while the caller is
+        # still speaking, unlike the request/response Whisper endpoint.
+        "stt": deepgram.STT(
+            model="nova-3",
+            language="en",
+            interim_results=True,
+            # Deepgram finalizes the transcript ~200ms after speech stops,
+            # complementing the session-level endpointing delay.
+            endpointing_ms=200,
+        ),
+        # One HTTP/2 client with keep-alive behind the LLM: requests from
+        # every session multiplex over a single warm TLS connection, so no
+        # turn pays a fresh handshake on the first-token path. Cartesia
+        # and Deepgram already share the worker's pooled aiohttp session
+        # via the plugins' http_context.
+        "llm": openai.LLM(
+            model="gpt-4o-mini",
+            temperature=0.7,
+            client=AsyncOpenAI(
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    timeout=httpx.Timeout(10.0, connect=2.0),
+                    limits=httpx.Limits(
+                        max_connections=50, max_keepalive_connections=50,
+                    ),
+                ),
+            ),
+        ),
+        # Cartesia streams PCM chunks over WebSocket as they are
+        # synthesized, so first audio arrives well before the full reply.
+        # The turbo variant at 16 kHz is tuned for time-to-first-audio:
+        # telephony callers can't hear the 24 kHz headroom anyway, and a
+        # third fewer samples per second means smaller frames on the wire.
+        "tts": cartesia.TTS(
+            model="sonic-turbo",
+            encoding="pcm_s16le",
+            sample_rate=16000,
+        ),
+    }
+
+
+# Property inquiry context for Ivy Homes.
+#
+# This must stay a frozen, byte-stable constant: provider-side prompt caching
+# keys on the exact prompt prefix, so after the first turn the system prompt
+# is billed and prefilled at the cached rate. Never append per-turn data
+# (search results, caller details) here — that belongs in tool responses and
+# user messages, which sit after the cached prefix.
+AGENT_INSTRUCTIONS: Final[str] = (
+    "You are the Ivy Homes voice assistant. Ivy Homes only sells residential "
+    "flats in Bangalore: no rentals, houses, villas, commercial property, or "
+    "other cities — politely redirect such requests. Help buyers by gathering "
+    "area (e.g. Whitefield, Koramangala, HSR Layout), budget in lakhs or "
+    "crores, BHK count, and preferred features, then always call "
+    "search_properties to find flats; call search_properties_with_details "
+    "when the buyer wants specifics, and get_property_details for one or "
+    "more known flats. If nothing matches, suggest adjusting budget or "
+    "area. After "
+    "sharing results, offer details, a site visit, or other areas, and "
+    "collect name, phone, and email to connect them with a specialist. "
+    "Speak concise, warm Indian English (flat, lakhs, crores, BHK), be "
+    "patient with first-time buyers, and highlight tech-park proximity, "
+    "metro connectivity, and amenities."
+)
 
-6. **Use get_property_details function** when they ask about a specific flat
+# One canonical prompt object: interning means every consumer shares the
+# same str, and the precomputed UTF-8 bytes spare re-encoding the multi-KB
+# prompt wherever raw content is needed. The content hash versions the tool
+# response caches, so editing the prompt automatically invalidates them.
+AGENT_INSTRUCTIONS = sys.intern(AGENT_INSTRUCTIONS)
+AGENT_INSTRUCTIONS_BYTES: Final[bytes] = AGENT_INSTRUCTIONS.encode("utf-8")
+PROMPT_VERSION: Final[str] = hashlib.blake2b(
+    AGENT_INSTRUCTIONS_BYTES, digest_size=16,
+).hexdigest()
+
+
+# Tool definitions live at module scope so the function-tool decorator
+# introspects the annotations and builds the JSON schema once at import,
+# not on every job. They only touch module-level state (PROPERTY_SERVICE),
+# so there is nothing per-job to close over.
+
+# Cached search + formatting, shared by the search tool. Kept separate
+# from the tool so cache hits never skip the spoken output.
+@semantic_cache(ttl=600, threshold=0.92, namespace=PROMPT_VERSION)
+async def _search_sentences(
+    location: str | None = None,
+    property_type: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    bedrooms: int | None = None,
+    bathrooms: int | None = None,
+) -> str:
+    service = _get_property_service()
+    properties = await service.search_properties(
+        location=location,
+        property_type=property_type,
+        min_price=min_price,
+        max_price=max_price,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        max_results=5,
+    )
+    return "\n".join(service.format_property_sentences(properties))
+
+
+@llm.function_tool(description="Search for residential flats for sale in Bangalore based on buyer criteria")
+async def search_properties(
+    context: RunContext,
+    location: Annotated[
+        str | None,
+        "Neighborhood or area in Bangalore (e.g., Whitefield, Koramangala, HSR Layout, Indiranagar, Electronic City)",
+    ] = None,
+    property_type: Annotated[
+        str | None,
+        "Always 'apartment' or 'flat' - we only sell residential flats",
+    ] = None,
+    min_price: Annotated[
+        float | None,
+        "Minimum price in Indian Rupees",
+    ] = None,
+    max_price: Annotated[
+        float | None,
+        "Maximum price in Indian Rupees",
+    ] = None,
+    bedrooms: Annotated[
+        int | None,
+        "Number of bedrooms/BHK required (1, 2, 3, or 4)",
+    ] = None,
+    bathrooms: Annotated[
+        int | None,
+        "Number of bathrooms required",
+    ] = None,
+) -> str:
+    """Search for flats matching the buyer's criteria."""
+    logger.info("Function called: search_properties")
+
+    sentences = (
+        await _search_sentences(
+            location=location,
+            property_type=property_type,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            bathrooms=bathrooms,
+        )
+    ).split("\n")
+
+    # Queue each sentence to TTS immediately so the caller hears the
+    # first result while later ones are still synthesizing, instead
+    # of waiting for the LLM to rewrite the whole list.
+    for sentence in sentences:
+        context.session.say(sentence)
+
+    return (
+        "The following was already read out to the caller: "
+        + " ".join(sentences)
+        + " Do not repeat the list; continue with a short follow-up."
+    )
 
-7. After sharing flats:
-   - Ask if they'd like more details about any specific flat
-   - Offer to schedule a site visit/viewing
-   - Ask if they want to see other options in different areas or budget ranges
-   - Mention amenities and nearby facilities (metro stations, schools, hospitals, tech parks)
 
-8. For scheduling site visits or detailed discussions:
-   - Offer to connect them with a property specialist
-   - Collect their contact information (name, phone number, email)
+@llm.function_tool(description="Get detailed information about one or more specific flats for sale")
+@semantic_cache(ttl=600, exact=True, namespace=PROMPT_VERSION)
+async def get_property_details(
+    property_ids: Annotated[
+        list[str],
+        "The unique IDs of the flats",
+    ],
+) -> str:
+    """Get details about one or more specific flats.
+
+    Lookups fan out concurrently through the service's batch fetch, so
+    asking about several flats costs one awaited round-trip, not N.
+    """
+    logger.info("Function called: get_property_details(%s)", property_ids)
+
+    props = await _get_property_service().get_properties_details(property_ids)
+
+    if not props:
+        return f"I couldn't find any flat with ID {', '.join(property_ids)}."
+
+    details = "\n".join(_format_property_details(prop) for prop in props)
+    missing = set(property_ids) - {prop.id for prop in props}
+    if missing:
+        details += f"\nNo flat found with ID {', '.join(sorted(missing))}."
+    return details
+
+
+@llm.function_tool(description="Search for flats and get full details of the top matches in one call - prefer this over separate search and detail calls when the buyer wants specifics")
+@semantic_cache(ttl=600, threshold=0.92, namespace=PROMPT_VERSION)
+async def search_properties_with_details(
+    location: Annotated[
+        str | None,
+        "Neighborhood or area in Bangalore (e.g., Whitefield, Koramangala, HSR Layout, Indiranagar, Electronic City)",
+    ] = None,
+    property_type: Annotated[
+        str | None,
+        "Always 'apartment' or 'flat' - we only sell residential flats",
+    ] = None,
+    min_price: Annotated[
+        float | None,
+        "Minimum price in Indian Rupees",
+    ] = None,
+    max_price: Annotated[
+        float | None,
+        "Maximum price in Indian Rupees",
+    ] = None,
+    bedrooms: Annotated[
+        int | None,
+        "Number of bedrooms/BHK required (1, 2, 3, or 4)",
+    ] = None,
+    bathrooms: Annotated[
+        int | None,
+        "Number of bathrooms required",
+    ] = None,
+) -> str:
+    """Search for flats and include full details of each match.
+
+    Batching search and details into one tool response halves the LLM
+    round-trips for the common "find flats and tell me about them" flow.
+    """
+    logger.info("Function called: search_properties_with_details")
+
+    service = _get_property_service()
+    properties = await service.search_properties(
+        location=location,
+        property_type=property_type,
+        min_price=min_price,
+        max_price=max_price,
+        bedrooms=bedrooms,
+        bathrooms=bathrooms,
+        max_results=3,
+    )
 
-Keep responses concise and natural for voice conversation. Use Indian English and terminology (flat, lakhs, crores, BHK).
-Be empathetic and patient, especially with first-time home buyers.
+    if not properties:
+        return "I couldn't find any properties matching your criteria."
 
-When you find flats, be excited and descriptive! Highlight Bangalore-specific benefits like proximity to tech parks, metro connectivity, and amenities."""
+    summary = service.format_property_summary(properties)
+    details = "\n".join(
+        f"{prop.id}: {_format_property_details(prop)}" for prop in properties
+    )
+    return f"{summary}\n\nDETAILS:\n{details}"
 
 
 class IvyHomesAssistant(Agent):
@@ -88,90 +371,71 @@ class IvyHomesAssistant(Agent):
         """Create the voice pipeline for the agent."""
         logger.info("Creating Ivy Homes assistant pipeline")
 
-        # Define function for searching flats
-        @llm.function_tool(description="Search for residential flats for sale in Bangalore based on buyer criteria")
-        async def search_properties(
-            location: Annotated[
-                str | None,
-                "Neighborhood or area in Bangalore (e.g., Whitefield, Koramangala, HSR Layout, Indiranagar, Electronic City)"
-            ] = None,
-            property_type: Annotated[
-                str | None,
-                "Always 'apartment' or 'flat' - we only sell residential flats"
-            ] = None,
-            min_price: Annotated[
-                float | None,
-                "Minimum price in Indian Rupees"
-            ] = None,
-            max_price: Annotated[
-                float | None,
-                "Maximum price in Indian Rupees"
-            ] = None,
-            bedrooms: Annotated[
-                int | None,
-                "Number of bedrooms/BHK required (1, 2, 3, or 4)"
-            ] = None,
-            bathrooms: Annotated[
-                int | None,
-                "Number of bathrooms required"
-            ] = None,
-        ) -> str:
-            """Search for flats matching the buyer's criteria."""
-            logger.info("Function called: search_properties")
-
-            properties = await PROPERTY_SERVICE.search_properties(
-                location=location,
-                property_type=property_type,
-                min_price=min_price,
-                max_price=max_price,
-                bedrooms=bedrooms,
-                bathrooms=bathrooms,
-                max_results=5,
-            )
-
-            return PROPERTY_SERVICE.format_property_summary(properties)
-
-        # Define function for getting flat details
-        @llm.function_tool(description="Get detailed information about a specific flat for sale")
-        async def get_property_details(
-            property_id: Annotated[
-                str,
-                "The unique ID of the flat"
-            ],
-        ) -> str:
-            """Get details about a specific flat."""
-            logger.info(f"Function called: get_property_details({property_id})")
-
-            prop = await PROPERTY_SERVICE.get_property_details(property_id)
-
-            if not prop:
-                return f"I couldn't find a flat with ID {property_id}."
-
-            # Format price in Indian Rupees (lakhs/crores)
-            price = prop.get('price', 0)
-            if price >= 10000000:  # 1 crore or more
-                price_str = f"₹{price / 10000000:.2f} crores"
-            else:
-                price_str = f"₹{price / 100000:.2f} lakhs"
-
-            return (
-                f"Here are the details for this flat: "
-                f"It's a {prop.get('bedrooms', 0)}-BHK flat with {prop.get('bathrooms', 0)} bathrooms, "
-                f"located in {prop.get('neighborhood', '')}, {prop.get('city', 'Bangalore')}. "
-                f"The address is {prop.get('address', 'available on request')}. "
-                f"The price is {price_str}. "
-                f"It has {prop.get('square_feet', 0)} square feet of space. "
-                f"{prop.get('description', '')} "
-                f"Built in {prop.get('year_built', 'recent year')}. "
-            )
-
-        # Create the assistant with function calling
-        assistant = cls(
+        return cls(
             instructions=AGENT_INSTRUCTIONS,
-            tools=[search_properties, get_property_details],
+            tools=[
+                search_properties,
+                get_property_details,
+                search_properties_with_details,
+            ],
         )
 
-        return assistant
+
+async def _warm_llm(llm_client: llm.LLM) -> None:
+    """Prime the LLM provider with a one-token ping.
+
+    The first real turn then hits an established HTTP connection and a
+    provider-side cached system prompt instead of paying both cold.
+    """
+    try:
+        chat_ctx = llm.ChatContext()
+        chat_ctx.add_message(role="system", content=AGENT_INSTRUCTIONS)
+        chat_ctx.add_message(role="user", content="ping")
+        stream = llm_client.chat(chat_ctx=chat_ctx)
+        async for _ in stream:
+            break
+        await stream.aclose()
+    except Exception as e:
+        logger.warning("LLM warmup failed: %s", e)
+
+
+def _build_session(models: dict) -> AgentSession:
+    """Build an AgentSession around the process-wide components.
+
+    Sessions are intentionally per-room: AgentSession carries conversation
+    state that must not leak between callers. Everything expensive — VAD
+    weights, the STT/LLM/TTS clients and their pooled connections — lives
+    in the shared singletons, so constructing the session itself is cheap
+    and a cross-room session pool would only add state-isolation risk.
+    """
+    return AgentSession(
+        vad=models["vad"],
+        stt=models["stt"],
+        llm=models["llm"],
+        tts=models["tts"],
+        # Telephony-tuned endpointing: with streaming STT the transcript is
+        # already final at end of speech, so the default 0.5s wait is idle
+        # time added to every turn.
+        min_endpointing_delay=0.15,
+        # Start the LLM/TTS run on the interim transcript; if the final
+        # transcript matches, the response is already in flight.
+        preemptive_generation=True,
+    )
+
+
+def prewarm(proc: JobProcess) -> None:
+    """Load model weights before the worker accepts any job.
+
+    silero.VAD.load() does its torch/onnx initialization on first call;
+    warming it here keeps that cost off the first user turn. The shared
+    components are stashed in proc.userdata for the entrypoint to pick up.
+    """
+    logger.info("Prewarming session components")
+    proc.userdata["models"] = get_models()
+    # Construct the property service here (one inventory parse per
+    # process) so the import path stays cheap and the parse overlaps
+    # model loading instead of preceding it.
+    _get_property_service()
 
 
 async def entrypoint(job_context: JobContext) -> None:
@@ -180,28 +444,46 @@ async def entrypoint(job_context: JobContext) -> None:
 
     # Connect to the room
     await job_context.connect()
+    service = _get_property_service()
+    job_context.add_shutdown_callback(service.close)
 
     # Create the assistant
     assistant = IvyHomesAssistant.create_pipeline(job_context)
 
-    # Create and start the agent session
-    session = AgentSession(
-        vad=silero.VAD.load(),
-        stt=openai.STT(model="whisper-1"),
-        llm=openai.LLM(model="gpt-4o-mini", temperature=0.7),
-        tts=openai.TTS(voice="alloy"),
+    # Create and start the agent session from the prewarmed components
+    models = job_context.proc.userdata.get("models") or get_models()
+
+    # Prefetch slow dependencies concurrently with session setup and the
+    # participant's audio subscription; the first real turn then hits a
+    # warm property store and a warm LLM connection. Deliberately not
+    # awaited here.
+    prefetch = asyncio.gather(
+        service.warmup(),
+        _warm_llm(models["llm"]),
+        return_exceptions=True,
     )
-
-    await session.start(agent=assistant, room=job_context.room)
-
-    # Generate initial greeting
-    await session.generate_reply(
-        instructions="Greet the caller warmly and introduce yourself as the Ivy Homes assistant."
+    job_context.proc.userdata["prefetch"] = prefetch
+
+    session = _build_session(models)
+
+    await session.start(
+        agent=assistant,
+        room=job_context.room,
+        # BVC runs its DSP in the plugin's native audio pipeline, off the
+        # asyncio thread, so denoising never stalls the VAD or the
+        # LLM/TTS WebSocket readers.
+        room_input_options=RoomInputOptions(
+            noise_cancellation=noise_cancellation.BVC(),
+        ),
     )
 
+    # Speak the fixed greeting directly: no LLM TTFT on the opener, just
+    # TTS synthesis, so first audio reaches the caller sooner.
+    await session.say(GREETING)
+
     logger.info("Ivy Homes assistant started successfully")
 
 
 if __name__ == "__main__":
     # Run the agent using LiveKit CLI
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
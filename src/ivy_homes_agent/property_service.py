@@ -1,12 +1,135 @@
 """Property data service for querying live inventory."""
 
-import json
+import asyncio
+import functools
 import logging
+import mmap
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any
+
+import aiohttp
+import numpy as np
+
+# orjson parses the property payloads severalfold faster than stdlib json
+# (SIMD structural scanning, bytes in, no intermediate str); fall back to
+# stdlib so a minimal install still works.
+try:
+    from orjson import loads as _json_loads
+
+    _HAS_ORJSON = True
+except ImportError:
+    from json import loads as _json_loads
+
+    _HAS_ORJSON = False
 
 logger = logging.getLogger("ivy-homes-agent")
 
+# Search result cache: bounded LRU with a short TTL, keyed by the
+# canonicalized criteria tuple. Prices are bucketed to the nearest lakh so
+# trivially different budgets ("99 lakhs" vs "1 crore minus a bit") share
+# an entry.
+_SEARCH_CACHE_SIZE = 256
+_SEARCH_CACHE_TTL = 60.0
+_PRICE_BUCKET = 100_000
+
+# Inventories larger than this run the file scan in a worker thread so
+# audio frame processing on the event loop is never starved; below it the
+# vectorized scan finishes in microseconds and a thread handoff would
+# cost more than it saves.
+_SYNC_SCAN_LIMIT = 1000
+
+# Inventory files above this size are memory-mapped and parsed zero-copy
+# from the page cache; below it a plain buffered read is cheaper.
+_MMAP_THRESHOLD = 64 * 1024
+
+# Per-property budget for text returned to the LLM. Everything the tool
+# returns is re-read as prompt tokens on the next turn, so summaries stay
+# within roughly this many tokens per listing: descriptions are clipped to
+# _DESCRIPTION_CHARS (~30 tokens) for a single match and omitted entirely
+# in multi-property lists.
+MAX_TOOL_RETURN_TOKENS = 40
+_DESCRIPTION_CHARS = 120
+
+
+@dataclass(slots=True)
+class Property:
+    """A single listed property, materialized from the raw JSON record.
+
+    Slotted attributes keep per-record memory low and make field access a
+    C-level slot read instead of a dict hash lookup in the filter and
+    formatting hot paths.
+    """
+
+    id: str = ""
+    type: str = ""
+    address: str = ""
+    neighborhood: str = ""
+    city: str = ""
+    state: str = ""
+    zip: str = ""
+    price: float = 0
+    bedrooms: int = 0
+    bathrooms: int = 0
+    square_feet: int = 0
+    year_built: int | None = None
+    description: str = ""
+    features: list[str] = field(default_factory=list)
+    status: str = ""
+    listing_date: str = ""
+    # Derived at load time, never present in the raw record: the one-line
+    # summary spoken in multi-property lists. Precomputing it moves the
+    # f-string and currency formatting out of the per-response path.
+    short_summary: str = ""
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> "Property":
+        """Build a Property from a raw record, ignoring unknown keys."""
+        return cls(**{k: v for k, v in raw.items() if k in _PROPERTY_FIELDS})
+
+
+_PROPERTY_FIELDS = frozenset(f.name for f in fields(Property))
+
+
+@functools.lru_cache(maxsize=128)
+def _token_pattern(token: str) -> "re.Pattern[str]":
+    """Compiled word-start pattern for a location token.
+
+    Anchoring at a word boundary but leaving the tail open keeps partial
+    spellings ('whitefiel') matching; the compiled state machine scans the
+    composite location string faster than a Python-level substring check.
+    """
+    return re.compile(r"\b" + re.escape(token))
+
+
+def _short_summary(prop: Property) -> str:
+    """One-line spoken summary for a property in a result list.
+
+    Normally served from the precomputed `short_summary` field; the
+    formatting here only runs for records that skipped column building
+    (e.g. API search results).
+    """
+    return (
+        prop.short_summary
+        or f"A {prop.bedrooms}-bedroom {prop.type or 'property'} in "
+        f"{prop.neighborhood or prop.city or 'the area'} for ${prop.price:,.0f}."
+    )
+
+
+def _clip_description(description: str) -> str:
+    """Clip a listing description to the tool-return budget.
+
+    Cuts at the last word boundary before `_DESCRIPTION_CHARS` so the
+    spoken sentence never ends mid-word.
+    """
+    if len(description) <= _DESCRIPTION_CHARS:
+        return description
+    clipped = description[:_DESCRIPTION_CHARS].rsplit(" ", 1)[0]
+    return f"{clipped}..."
+
 
 class PropertyService:
     """Service for querying property inventory data.
@@ -20,10 +143,10 @@ class PropertyService:
     def __init__(
         self,
         data_source: str = "file",
-        data_path: Optional[str] = None,
-        api_url: Optional[str] = None,
-        api_key: Optional[str] = None,
-    ):
+        data_path: str | None = None,
+        api_url: str | None = None,
+        api_key: str | None = None,
+    ) -> None:
         """Initialize the property service.
 
         Args:
@@ -37,9 +160,14 @@ class PropertyService:
         self.api_url = api_url
         self.api_key = api_key
         self.properties = []
+        self._session: aiohttp.ClientSession | None = None
+        self._search_cache: OrderedDict[tuple, tuple[float, list[Property]]] = (
+            OrderedDict()
+        )
 
         if data_source == "file":
             self._load_from_file()
+        self._build_columns()
 
     def _load_from_file(self) -> None:
         """Load property data from JSON file."""
@@ -50,25 +178,123 @@ class PropertyService:
         try:
             data_file = Path(self.data_path)
             if data_file.exists():
-                with open(data_file) as f:
-                    data = json.load(f)
-                    self.properties = data.get("properties", [])
-                logger.info(f"Loaded {len(self.properties)} properties from file")
+                data = self._parse_file(data_file)
+                self.properties = [
+                    Property.from_dict(raw) for raw in data.get("properties", [])
+                ]
+                # Cached result lists refer to the previous inventory;
+                # drop them so a reload is observed immediately.
+                self._search_cache.clear()
+                logger.info("Loaded %d properties from file", len(self.properties))
             else:
-                logger.warning(f"Property data file not found: {self.data_path}")
+                logger.warning("Property data file not found: %s", self.data_path)
         except Exception as e:
-            logger.error(f"Error loading property data: {e}")
+            logger.error("Error loading property data: %s", e)
+
+    @staticmethod
+    def _parse_file(data_file: Path) -> dict[str, Any]:
+        """Parse the inventory JSON, memory-mapping large files.
+
+        mmap lets orjson read straight out of the page cache without first
+        copying the file into a Python bytes object. Small files (and the
+        stdlib fallback, which only accepts bytes) use one buffered read.
+        """
+        if _HAS_ORJSON and data_file.stat().st_size > _MMAP_THRESHOLD:
+            with open(data_file, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return _json_loads(memoryview(mm))
+        return _json_loads(data_file.read_bytes())
+
+    def _build_columns(self) -> None:
+        """Build columnar arrays over the loaded properties.
+
+        Numeric filters in `_search_file` run as vectorized comparisons on
+        these arrays instead of per-row Python predicates. Missing values are
+        filled with sentinels that can never match a real criterion.
+        """
+        self._price = np.array(
+            [p.price for p in self.properties], dtype=np.float64,
+        )
+        self._bedrooms = np.array(
+            [p.bedrooms for p in self.properties], dtype=np.int16,
+        )
+        self._bathrooms = np.array(
+            [p.bathrooms for p in self.properties], dtype=np.int16,
+        )
+
+        # Lowercased composites, computed once here instead of per query.
+        self._loc_lc = [
+            f"{p.city} {p.neighborhood} {p.address}".lower()
+            for p in self.properties
+        ]
+        self._type_lc = [p.type.lower() for p in self.properties]
+        self._type_arr = np.array(self._type_lc, dtype=object)
+
+        # Direct id lookup for get_property_details.
+        self._by_id = {p.id: p for p in self.properties if p.id}
+
+        # Pre-render the spoken one-liners so result formatting is plain
+        # string joins. Rebuilt with the columns on every (re)load, so a
+        # refreshed inventory never serves stale summaries.
+        for p in self.properties:
+            p.short_summary = ""
+            p.short_summary = _short_summary(p)
+
+        # Token-level inverted index over city/neighborhood/address: each
+        # lowercased token maps to the row indices containing it, so a
+        # location query resolves to candidate rows by set intersection
+        # instead of a substring scan over every property.
+        self._location_tokens: dict[str, set[int]] = {}
+        for i, text in enumerate(self._loc_lc):
+            for token in text.replace(",", " ").split():
+                self._location_tokens.setdefault(token, set()).add(i)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use.
+
+        One long-lived session keeps connections pooled across tool calls,
+        so repeated searches reuse an open TCP/TLS connection instead of
+        paying a fresh handshake on the conversational path.
+        """
+        if self._session is None or self._session.closed:
+            headers = {}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                # Bounded so a slow backend can't hold a voice turn hostage;
+                # cached DNS keeps reconnects off the resolver.
+                timeout=aiohttp.ClientTimeout(total=5),
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def warmup(self) -> None:
+        """Warm the property store ahead of the first query.
+
+        Reloads the file if nothing is cached yet so the first tool call
+        never pays the JSON parse. Once the API source is implemented this
+        is also the place to open keep-alive connections.
+        """
+        if self.data_source == "file" and not self.properties:
+            self._load_from_file()
+            self._build_columns()
 
     async def search_properties(
         self,
-        location: Optional[str] = None,
-        property_type: Optional[str] = None,
-        min_price: Optional[float] = None,
-        max_price: Optional[float] = None,
-        bedrooms: Optional[int] = None,
-        bathrooms: Optional[int] = None,
+        location: str | None = None,
+        property_type: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        bedrooms: int | None = None,
+        bathrooms: int | None = None,
         max_results: int = 5,
-    ) -> list[dict[str, Any]]:
+    ) -> list[Property]:
         """Search for properties matching the criteria.
 
         Args:
@@ -84,117 +310,181 @@ class PropertyService:
             List of matching properties with details
         """
         logger.info(
-            f"Searching properties: location={location}, type={property_type}, "
-            f"price={min_price}-{max_price}, bed={bedrooms}, bath={bathrooms}"
+            "Searching properties: location=%s, type=%s, price=%s-%s, bed=%s, bath=%s",
+            location, property_type, min_price, max_price, bedrooms, bathrooms,
+        )
+
+        # The LLM frequently re-emits identical criteria within a
+        # conversation ("show me more", retries); serve those from the
+        # bounded LRU instead of re-running the search.
+        key = self._search_cache_key(
+            location, property_type, min_price, max_price,
+            bedrooms, bathrooms, max_results,
         )
+        now = time.monotonic()
+        cached = self._search_cache.get(key)
+        if cached is not None and cached[0] > now:
+            self._search_cache.move_to_end(key)
+            logger.info("Search cache hit")
+            return cached[1]
 
         if self.data_source == "file":
-            return self._search_file(
-                location, property_type, min_price, max_price,
-                bedrooms, bathrooms, max_results
-            )
+            if len(self.properties) > _SYNC_SCAN_LIMIT:
+                results = await asyncio.to_thread(
+                    self._search_file,
+                    location, property_type, min_price, max_price,
+                    bedrooms, bathrooms, max_results,
+                )
+            else:
+                results = self._search_file(
+                    location, property_type, min_price, max_price,
+                    bedrooms, bathrooms, max_results,
+                )
         elif self.data_source == "api":
-            return await self._search_api(
+            results = await self._search_api(
                 location, property_type, min_price, max_price,
-                bedrooms, bathrooms, max_results
+                bedrooms, bathrooms, max_results,
             )
         else:
-            logger.error(f"Unsupported data source: {self.data_source}")
+            logger.error("Unsupported data source: %s", self.data_source)
             return []
 
+        self._search_cache[key] = (now + _SEARCH_CACHE_TTL, results)
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return results
+
+    @staticmethod
+    def _search_cache_key(
+        location: str | None,
+        property_type: str | None,
+        min_price: float | None,
+        max_price: float | None,
+        bedrooms: int | None,
+        bathrooms: int | None,
+        max_results: int,
+    ) -> tuple:
+        """Canonicalize search criteria into a hashable cache key.
+
+        None means "criterion absent" and is kept distinct from falsy
+        values like a zero price or bedrooms=0, which are real filters.
+        """
+        return (
+            location.strip().lower() if location is not None else None,
+            property_type.strip().lower() if property_type is not None else None,
+            round(min_price / _PRICE_BUCKET) if min_price is not None else None,
+            round(max_price / _PRICE_BUCKET) if max_price is not None else None,
+            bedrooms,
+            bathrooms,
+            max_results,
+        )
+
     def _search_file(
         self,
-        location: Optional[str],
-        property_type: Optional[str],
-        min_price: Optional[float],
-        max_price: Optional[float],
-        bedrooms: Optional[int],
-        bathrooms: Optional[int],
+        location: str | None,
+        property_type: str | None,
+        min_price: float | None,
+        max_price: float | None,
+        bedrooms: int | None,
+        bathrooms: int | None,
         max_results: int,
-    ) -> list[dict[str, Any]]:
+    ) -> list[Property]:
         """Search properties from loaded file data."""
-        results = []
-
-        for prop in self.properties:
-            # Filter by location
-            if location:
-                prop_location = (
-                    prop.get("city", "").lower() + " " +
-                    prop.get("neighborhood", "").lower() + " " +
-                    prop.get("address", "").lower()
-                )
-                if location.lower() not in prop_location:
-                    print('Here could be location issue')
-                    continue
-
-            # Filter by property type
-            if property_type:
-                if prop.get("type", "").lower() != property_type.lower():
-                    print('Here could be property type issue')
-                    continue
-
-            # Filter by price range
-            price = prop.get("price", 0)
-            if min_price and price < min_price:
-                print('Here could be min price issue')
-                continue
-            if max_price and price > max_price:
-                print('Here could be max price issue')
-                continue
-
-            # Filter by bedrooms
-            if bedrooms:
-                if prop.get("bedrooms") != bedrooms:
-                    print('Here could be bedrooms issue')
-                    continue
-
-            # Filter by bathrooms
-            if bathrooms:
-                if prop.get("bathrooms") != bathrooms:
-                    print('Here could be bathrooms issue')
-                    continue
+        # Numeric predicates run as vectorized masks over the columnar
+        # arrays; only the surviving rows pay the Python-level string checks.
+        # `is not None` rather than truthiness: bedrooms=0 (studio) and
+        # zero prices are legitimate criteria and must still filter.
+        mask = np.ones(len(self.properties), dtype=bool)
+        if min_price is not None:
+            mask &= self._price >= min_price
+        if max_price is not None:
+            mask &= self._price <= max_price
+        if bedrooms is not None:
+            mask &= self._bedrooms == bedrooms
+        if bathrooms is not None:
+            mask &= self._bathrooms == bathrooms
+        if location:
+            mask &= self._location_mask(location)
+        if property_type:
+            mask &= self._type_arr == property_type.lower()
+
+        results = [
+            self.properties[i] for i in np.flatnonzero(mask)[:max_results]
+        ]
+
+        logger.info("Found %d matching properties", len(results))
+        return results
 
-            results.append(prop)
+    def _location_mask(self, location: str) -> np.ndarray:
+        """Boolean row mask for properties matching a location query.
 
-            if len(results) >= max_results:
+        Every query token must match: tokens present in the inverted index
+        resolve to their row sets directly; tokens missing from the index
+        (partial words, unusual spellings) fall back to a compiled
+        word-start regex scan so queries like 'whitefiel' still match.
+        """
+        candidates: set[int] | None = None
+        for token in re.findall(r"\w+", location.lower()):
+            rows = self._location_tokens.get(token)
+            if rows is None:
+                pattern = _token_pattern(token)
+                rows = {
+                    i
+                    for i, text in enumerate(self._loc_lc)
+                    if pattern.search(text)
+                }
+            candidates = rows if candidates is None else candidates & rows
+            if not candidates:
                 break
 
-        logger.info(f"Found {len(results)} matching properties")
-        return results
+        mask = np.zeros(len(self.properties), dtype=bool)
+        if candidates:
+            mask[list(candidates)] = True
+        return mask
 
     async def _search_api(
         self,
-        location: Optional[str],
-        property_type: Optional[str],
-        min_price: Optional[float],
-        max_price: Optional[float],
-        bedrooms: Optional[int],
-        bathrooms: Optional[int],
+        location: str | None,
+        property_type: str | None,
+        min_price: float | None,
+        max_price: float | None,
+        bedrooms: int | None,
+        bathrooms: int | None,
         max_results: int,
-    ) -> list[dict[str, Any]]:
+    ) -> list[Property]:
         """Search properties via API."""
-        # TODO: Implement API integration
-        # Example structure:
-        # import aiohttp
-        # params = {
-        #     "location": location,
-        #     "type": property_type,
-        #     "min_price": min_price,
-        #     "max_price": max_price,
-        #     "bedrooms": bedrooms,
-        #     "bathrooms": bathrooms,
-        #     "limit": max_results,
-        # }
-        # headers = {"Authorization": f"Bearer {self.api_key}"}
-        # async with aiohttp.ClientSession() as session:
-        #     async with session.get(self.api_url, params=params, headers=headers) as resp:
-        #         data = await resp.json()
-        #         return data.get("properties", [])
-
-        logger.warning("API integration not yet implemented")
-        return []
-
-    async def get_property_details(self, property_id: str) -> Optional[dict[str, Any]]:
+        if not self.api_url:
+            logger.warning("No API URL configured for API data source")
+            return []
+
+        params = {
+            "location": location,
+            "type": property_type,
+            "min_price": min_price,
+            "max_price": max_price,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "limit": max_results,
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+
+        try:
+            session = self._get_session()
+            async with session.get(self.api_url, params=params) as resp:
+                resp.raise_for_status()
+                # orjson parses the raw bytes directly, skipping aiohttp's
+                # charset detection and the stdlib json parser.
+                data = _json_loads(await resp.read())
+                return [
+                    Property.from_dict(raw)
+                    for raw in data.get("properties", [])
+                ]
+        except Exception as e:
+            logger.error("Error searching properties via API: %s", e)
+            return []
+
+    async def get_property_details(self, property_id: str) -> Property | None:
         """Get detailed information about a specific property.
 
         Args:
@@ -203,51 +493,115 @@ class PropertyService:
         Returns:
             Property details or None if not found
         """
-        logger.info(f"Fetching details for property: {property_id}")
+        logger.info("Fetching details for property: %s", property_id)
 
         if self.data_source == "file":
-            for prop in self.properties:
-                if prop.get("id") == property_id:
-                    return prop
-            return None
+            return self._by_id.get(property_id)
         elif self.data_source == "api":
-            # TODO: Implement API call
-            logger.warning("API integration not yet implemented")
-            return None
+            if not self.api_url:
+                logger.warning("No API URL configured for API data source")
+                return None
+            try:
+                session = self._get_session()
+                url = f"{self.api_url.rstrip('/')}/{property_id}"
+                async with session.get(url) as resp:
+                    if resp.status == 404:
+                        return None
+                    resp.raise_for_status()
+                    return Property.from_dict(_json_loads(await resp.read()))
+            except Exception as e:
+                logger.error("Error fetching property details via API: %s", e)
+                return None
         else:
             return None
 
-    def format_property_summary(self, properties: list[dict[str, Any]]) -> str:
-        """Format property list for voice response.
+    async def get_properties_details(
+        self, property_ids: list[str],
+    ) -> list[Property]:
+        """Get details for several properties concurrently.
+
+        When the LLM asks about multiple flats in one turn the lookups run
+        in parallel (one awaited API round-trip instead of N serialized
+        ones); missing IDs are dropped from the result.
+
+        Args:
+            property_ids: Unique property identifiers
+
+        Returns:
+            Details for each property that was found
+        """
+        details = await asyncio.gather(
+            *(self.get_property_details(pid) for pid in property_ids),
+        )
+        return [prop for prop in details if prop is not None]
+
+    def format_property_sentences(self, properties: list[Property]) -> list[str]:
+        """Format property list as voice-ready sentences.
+
+        Returning individual sentences lets the agent pipeline start TTS on
+        the first sentence while the rest are still queuing, instead of
+        waiting for one monolithic summary string.
 
         Args:
             properties: List of property dictionaries
 
         Returns:
-            Formatted string suitable for voice output
+            List of sentences suitable for voice output
         """
         if not properties:
-            return "I couldn't find any properties matching your criteria."
+            return ["I couldn't find any properties matching your criteria."]
 
         if len(properties) == 1:
             prop = properties[0]
-            return (
-                f"I found a {prop.get('type', 'property')} at {prop.get('address', 'an available location')}. "
-                f"It has {prop.get('bedrooms', 0)} bedrooms, {prop.get('bathrooms', 0)} bathrooms, "
-                f"and is priced at ${prop.get('price', 0):,.0f}. "
-                f"{prop.get('description', '')}"
+            sentences = [
+                f"I found a {prop.type or 'property'} at {prop.address or 'an available location'}.",
+                f"It has {prop.bedrooms} bedrooms, {prop.bathrooms} bathrooms, "
+                f"and is priced at ${prop.price:,.0f}.",
+            ]
+            if prop.description:
+                sentences.append(_clip_description(prop.description))
+            return sentences
+
+        # Collapse near-identical listings (same building, same floorplan)
+        # before speaking: reading three interchangeable descriptions wastes
+        # TTS time and confuses callers. First listing per coarse key wins.
+        seen = set()
+        unique = []
+        for prop in properties:
+            dedup_key = (
+                prop.bedrooms,
+                prop.bathrooms,
+                prop.type,
+                prop.neighborhood,
+                round(prop.price / 10_000),
             )
-        else:
-            summary = f"I found {len(properties)} properties. Here are the top matches: "
-            for i, prop in enumerate(properties[:3], 1):
-                summary += (
-                    f"Property {i}: A {prop.get('bedrooms', 0)}-bedroom "
-                    f"{prop.get('type', 'property')} in {prop.get('neighborhood', prop.get('city', 'the area'))} "
-                    f"for ${prop.get('price', 0):,.0f}. "
-                )
+            if dedup_key in seen:
+                continue
+            seen.add(dedup_key)
+            unique.append(prop)
 
-            if len(properties) > 3:
-                summary += f"And {len(properties) - 3} more options. "
+        sentences = [f"I found {len(properties)} properties. Here are the top matches:"]
+        for i, prop in enumerate(unique[:3], 1):
+            sentences.append(f"Property {i}: {_short_summary(prop)}")
 
-            summary += "Would you like more details on any of these?"
-            return summary
+        duplicates = len(properties) - len(unique)
+        if duplicates:
+            sentences.append(
+                f"There are also {duplicates} similar listings to these.",
+            )
+        if len(unique) > 3:
+            sentences.append(f"And {len(unique) - 3} more options.")
+
+        sentences.append("Would you like more details on any of these?")
+        return sentences
+
+    def format_property_summary(self, properties: list[Property]) -> str:
+        """Format property list for voice response.
+
+        Args:
+            properties: List of property dictionaries
+
+        Returns:
+            Formatted string suitable for voice output
+        """
+        return " ".join(self.format_property_sentences(properties))
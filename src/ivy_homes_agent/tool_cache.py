@@ -0,0 +1,199 @@
+"""Response caches for the LLM tool hot path.
+
+Callers often ask near-identical questions ("flats in Whitefield" vs
+"flat in whitefield please"). Once the LLM has normalized those into tool
+arguments, a fuzzy match over the free-text arguments serves the cached
+formatted response without re-running the property search or re-formatting
+the summary. Numeric criteria (prices, bedroom counts) are never fuzzy:
+"2 BHK" and "3 BHK" differ by one character but are different queries, so
+they must match exactly for a hit.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from difflib import SequenceMatcher
+from typing import get_args, get_type_hints
+
+logger = logging.getLogger("ivy-homes-agent")
+
+# Bound the per-lookup similarity scan and the memory footprint.
+_MAX_ENTRIES = 256
+
+
+def _normalize_value(value: object) -> str:
+    """Canonicalize one tool argument for cache keying."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def make_key(*values: object) -> str:
+    """Build a canonical cache key from tool argument values."""
+    return "|".join(_normalize_value(v) for v in values)
+
+
+def _text_param_names(func: Callable) -> frozenset:
+    """Names of `func` parameters annotated as str (or str | None).
+
+    Only these fields take part in fuzzy matching; everything else —
+    prices, bedroom counts — must compare exactly, since numerically
+    distinct criteria are often a single character apart.
+    """
+    try:
+        hints = get_type_hints(func)
+    except Exception:
+        return frozenset()
+    return frozenset(
+        name
+        for name, hint in hints.items()
+        if name != "return" and (hint is str or str in get_args(hint))
+    )
+
+
+class ResponseCache:
+    """TTL-bounded cache mapping canonical argument keys to responses.
+
+    Keys are ``(exact_key, fuzzy_key)`` pairs, stored under the cache's
+    ``namespace``. Lookups try a full exact match first, then (unless
+    constructed with ``exact=True``) fall back to a similarity scan
+    restricted to entries whose namespace and exact part match, comparing
+    only the fuzzy (free-text) part against ``threshold``. Entries are
+    evicted LRU-style past ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        threshold: float = 0.92,
+        exact: bool = False,
+        max_entries: int = _MAX_ENTRIES,
+        namespace: str = "",
+    ) -> None:
+        self.ttl = ttl
+        self.threshold = threshold
+        self.exact = exact
+        self.max_entries = max_entries
+        # Version tag for the cached content (e.g. a hash of the system
+        # prompt). It prefixes every stored key, so entries written under
+        # an older prompt version can never be served after the prompt
+        # (and thus the namespace) changes.
+        self.namespace = namespace
+        self._entries: OrderedDict[
+            tuple[str, str, str], tuple[float, str],
+        ] = OrderedDict()
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        """Return the cached response for `key`, or None on a miss."""
+        now = time.monotonic()
+        key = (self.namespace, *key)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expiry, response = entry
+            if expiry > now:
+                self._entries.move_to_end(key)
+                return response
+            del self._entries[key]
+
+        if self.exact:
+            return None
+
+        # Fuzzy fallback: closest stored free-text part above the
+        # similarity threshold, among entries whose namespace and exact
+        # part (the numeric criteria) are identical.
+        namespace, exact_part, fuzzy_part = key
+        matcher = SequenceMatcher(b=fuzzy_part)
+        best_key = None
+        best_ratio = self.threshold
+        for stored_key, (expiry, _) in self._entries.items():
+            if expiry <= now or stored_key[:2] != (namespace, exact_part):
+                continue
+            matcher.set_seq1(stored_key[2])
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_key = stored_key
+                best_ratio = ratio
+
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][1]
+
+    def put(self, key: tuple[str, str], response: str) -> None:
+        """Store a response under `key`, evicting the oldest entry if full."""
+        key = (self.namespace, *key)
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+
+def semantic_cache(
+    ttl: float = 600.0,
+    threshold: float = 0.92,
+    exact: bool = False,
+    namespace: str = "",
+) -> Callable:
+    """Cache an async tool's string response keyed by its arguments.
+
+    Wrap the tool body (below the function-tool decorator) so repeated or
+    near-identical invocations return the previously formatted string
+    instead of hitting the property data source again. Fuzzy matching
+    applies only to str-annotated parameters; all other arguments must
+    match exactly. Set ``exact=True`` for identifier-keyed tools where
+    fuzzy matching makes no sense at all.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = ResponseCache(
+            ttl=ttl, threshold=threshold, exact=exact, namespace=namespace,
+        )
+        signature = inspect.signature(func)
+        text_params = _text_param_names(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: object, **kwargs: object) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (
+                make_key(
+                    *(
+                        v
+                        for n, v in bound.arguments.items()
+                        if n not in text_params
+                    ),
+                ),
+                make_key(
+                    *(
+                        v
+                        for n, v in bound.arguments.items()
+                        if n in text_params
+                    ),
+                ),
+            )
+
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info("Tool cache hit: %s", func.__name__)
+                return cached
+
+            response = await func(*args, **kwargs)
+            cache.put(key, response)
+            return response
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator